@@ -0,0 +1,167 @@
+import os
+import mmap
+import struct
+import time
+import numpy as np
+
+'''
+GPL2 License applies. Use at own risk.
+
+Live telemetry file shared by the Empties Calliper addon (calliper_v003_011.py)
+and outside processes. Needs no bpy, the reader needs only numpy.
+
+    reader = TelemetryReader("/path/to/calliper.telemetry")
+    seq, distances, deltas, angles = reader.read()
+
+The distances, deltas and angles attributes of a reader are views straight
+into the mapped file, read() returns a consistent snapshot of them.
+
+layout, little endian, 664 bytes:
+    0   4s      magic b'CALP'
+    4   uint32  layout version
+    8   uint64  sequence number, odd while a write is in progress
+    16  uint32  number of distances in use
+    20  uint32  number of angles in use
+    24  float64[TELEMETRY_SLOTS]     distances
+    ..  float64[TELEMETRY_SLOTS*3]   deltas, dx dy dz per distance
+    ..  float64[TELEMETRY_SLOTS]     angles (radians)
+'''
+
+TELEMETRY_MAGIC = b'CALP'
+TELEMETRY_VERSION = 1
+TELEMETRY_SLOTS = 16
+
+# writer side, struct formats.
+TELEMETRY_HEADER = '<4sIQII'
+TELEMETRY_SEQ_OFFSET = 8
+TELEMETRY_COUNTS_OFFSET = 16
+TELEMETRY_DATA_OFFSET = struct.calcsize(TELEMETRY_HEADER)
+TELEMETRY_DATA = '<%dd' % (TELEMETRY_SLOTS * 5)
+TELEMETRY_SIZE = TELEMETRY_DATA_OFFSET + struct.calcsize(TELEMETRY_DATA)
+
+# reader side, the same layout as a numpy dtype.
+TELEMETRY_LAYOUT = np.dtype([
+    ('magic', 'S4'),
+    ('version', '<u4'),
+    ('seq', '<u8'),
+    ('n_distances', '<u4'),
+    ('n_angles', '<u4'),
+    ('distances', '<f8', (TELEMETRY_SLOTS,)),
+    ('deltas', '<f8', (TELEMETRY_SLOTS, 3)),
+    ('angles', '<f8', (TELEMETRY_SLOTS,))])
+
+
+class TelemetryWriter(object):
+
+    def __init__(self, path):
+        self.path = path
+        self.last_values = None
+
+        # never truncate, a reader may still have the file mapped.
+        mode = 'r+b' if os.path.exists(path) else 'w+b'
+        self.file = open(path, mode)
+        try:
+            # refuse to take over a file which is not ours.
+            magic = self.file.read(len(TELEMETRY_MAGIC))
+            if magic and magic != TELEMETRY_MAGIC:
+                raise ValueError("not a calliper telemetry file: " + path)
+            self.file.seek(0, os.SEEK_END)
+            if self.file.tell() < TELEMETRY_SIZE:
+                self.file.truncate(TELEMETRY_SIZE)
+            self.buffer = mmap.mmap(self.file.fileno(), TELEMETRY_SIZE)
+        except Exception:
+            self.file.close()
+            raise
+
+        magic, version, seq = struct.unpack_from('<4sIQ', self.buffer, 0)
+        if magic == TELEMETRY_MAGIC and version == TELEMETRY_VERSION:
+            # carry on counting, readers waiting on a seq never go backwards.
+            self.seq = seq
+            if seq % 2:
+                # an earlier writer died mid-write, publish an empty set.
+                self.seq = seq + 1
+                struct.pack_into('<II', self.buffer, TELEMETRY_COUNTS_OFFSET,
+                    0, 0)
+        else:
+            self.seq = 0
+            struct.pack_into('<II', self.buffer, TELEMETRY_COUNTS_OFFSET,
+                0, 0)
+        struct.pack_into('<4sI', self.buffer, 0,
+            TELEMETRY_MAGIC, TELEMETRY_VERSION)
+        struct.pack_into('<Q', self.buffer, TELEMETRY_SEQ_OFFSET, self.seq)
+
+    def write(self, distances, deltas, angles):
+        values = tuple(distances), tuple(deltas), tuple(angles)
+        if values == self.last_values:
+            return False
+
+        def padded(items, size):
+            return list(items) + [0.0] * (size - len(items))
+
+        data = padded(values[0], TELEMETRY_SLOTS)
+        data += padded(values[1], TELEMETRY_SLOTS * 3)
+        data += padded(values[2], TELEMETRY_SLOTS)
+
+        # odd sequence number tells readers the arrays are being written.
+        self.seq += 1
+        struct.pack_into('<Q', self.buffer, TELEMETRY_SEQ_OFFSET, self.seq)
+        struct.pack_into('<II', self.buffer, TELEMETRY_COUNTS_OFFSET,
+            len(values[0]), len(values[2]))
+        struct.pack_into(TELEMETRY_DATA, self.buffer, TELEMETRY_DATA_OFFSET,
+            *data)
+        self.seq += 1
+        struct.pack_into('<Q', self.buffer, TELEMETRY_SEQ_OFFSET, self.seq)
+
+        self.last_values = values
+        return True
+
+    def close(self):
+        self.buffer.close()
+        self.file.close()
+
+
+class TelemetryReader(object):
+
+    def __init__(self, path):
+        self.data = np.memmap(path, dtype=TELEMETRY_LAYOUT, mode='r',
+                              shape=(1,))[0]
+        if self.data['magic'] != TELEMETRY_MAGIC:
+            raise ValueError("not a calliper telemetry file: " + path)
+        if self.data['version'] != TELEMETRY_VERSION:
+            raise ValueError("unsupported telemetry version: " +
+                             str(self.data['version']))
+
+        self.distances = self.data['distances']
+        self.deltas = self.data['deltas']
+        self.angles = self.data['angles']
+
+    @property
+    def seq(self):
+        return int(self.data['seq'])
+
+    def read(self, timeout=1.0, interval=0.001):
+        # retry while the writer is busy (odd seq) or wrote during the copy.
+        deadline = time.time() + timeout
+        while True:
+            seq = self.seq
+            if seq % 2 == 0:
+                n_distances = int(self.data['n_distances'])
+                n_angles = int(self.data['n_angles'])
+                distances = self.distances[:n_distances].copy()
+                deltas = self.deltas[:n_distances].copy()
+                angles = self.angles[:n_angles].copy()
+                if self.seq == seq:
+                    return seq, distances, deltas, angles
+            if time.time() > deadline:
+                raise RuntimeError("telemetry writer did not settle")
+            time.sleep(interval)
+
+    def wait(self, last_seq, timeout=1.0, interval=0.01):
+        # block until the writer has published something newer than
+        # last_seq, returns None when nothing arrived within timeout.
+        deadline = time.time() + timeout
+        while self.seq == last_seq or self.seq % 2:
+            if time.time() > deadline:
+                return None
+            time.sleep(interval)
+        return self.read(max(deadline - time.time(), 0.0))
@@ -2,6 +2,7 @@ import bpy
 import bgl
 import blf
 import bpy_extras
+import numpy as np
 from math import pi, degrees, floor
 
 from mathutils import Vector, Euler
@@ -55,11 +56,7 @@ def get_distance(names_of_empties):
     if names_of_empties == None:
         return 0.0
 
-    coordlist = []
-    for name in names_of_empties:
-        coordlist.append(bpy.data.objects[name].location)
-
-    return (coordlist[0]-coordlist[1]).length
+    return measure_distance(names_of_empties[0], names_of_empties[1])
 
 
 def get_distance_from_context(context):
@@ -67,21 +64,10 @@ def get_distance_from_context(context):
     # no assignment needed
 
 def get_coordinates_from_empties(object_list):
-    return [obj.location for obj in object_list]
+    return [obj.matrix_world.to_translation() for obj in object_list]
     # return coordlist
 
 
-def get_difference(axis, coord):
-    if axis == 'z':
-        return abs((coord[0]-coord[1]).z)
-    elif axis == 'y':
-        return abs((coord[0]-coord[1]).y)
-    elif axis == 'x':
-        return abs((coord[0]-coord[1]).x)
-    else:
-        return None
-
-
 def return_sorted_coordlist(coords):
     def MyFn(coord):  
         return coord.z
@@ -97,6 +83,232 @@ def get_tetrahedron(clist):
     return apex, base1, base2, base3    
 
 
+'''
+    float64 measurement core
+
+    The core pulls the world matrices of all empties involved into one
+    float64 array and computes distances, deltas and angles for the whole
+    batch in one pass. Blender stores matrix_world in float32, so positions
+    far from the world origin are already rounded before they get here,
+    float64 only keeps the arithmetic from adding rounding of its own.
+'''
+
+# vertex order of the edges and angles of a 3 empty set, as draw_tris uses.
+TRI_EDGES = [[0, 1], [1, 2], [2, 0]]
+TRI_ANGLES = [[2, 0, 1], [0, 1, 2], [1, 2, 0]]
+
+
+def get_world_coords(objects):
+    matrices = np.array([ob.matrix_world for ob in objects], dtype=np.float64)
+    return matrices[:, :3, 3]
+
+
+def measure_pairs(pairs):
+    vectors = pairs[:, 0] - pairs[:, 1]
+    distances = np.sqrt(np.einsum('ij,ij->i', vectors, vectors))
+    return distances, np.abs(vectors)
+
+
+def measure_triples(triples):
+    # angle at the middle point, atan2 stays accurate near 0 and pi and
+    # gives 0.0 for zero length edges.
+    vec1 = triples[:, 0] - triples[:, 1]
+    vec2 = triples[:, 2] - triples[:, 1]
+    cross = np.cross(vec1, vec2)
+    sin_part = np.sqrt(np.einsum('ij,ij->i', cross, cross))
+    cos_part = np.einsum('ij,ij->i', vec1, vec2)
+    return np.arctan2(sin_part, cos_part)
+
+
+def measure_set(coords):
+    # all readouts of a 2 or 3 empty selection.
+    if len(coords) == 2:
+        distances, deltas = measure_pairs(coords[np.newaxis])
+        angles = np.zeros(0)
+    else:
+        distances, deltas = measure_pairs(coords[TRI_EDGES])
+        angles = measure_triples(coords[TRI_ANGLES])
+    return distances, deltas, angles
+
+
+'''
+    scripting / driver api
+
+    measure_distance(a, b)        linear distance between two empties
+    measure_angle(a, b, c)        angle (radians) at b, spread by a and c
+    measure_distances(pairs)      batched measure_distance
+    measure_angles(triples)       batched measure_angle
+    measure_objects(objects)      distances, deltas and angles of 2 or 3
+
+    a, b, c can be object names or objects. The first four are added to the
+    driver namespace, so a driver expression can read for instance:
+        measure_distance("Empty", "Empty.001") * 0.5
+    Results are memoized on the world translations of the empties involved,
+    drivers reading unchanged empties get the stored value back instead of
+    redoing the math. The cache is also emptied before every scene update
+    and frame change, which only keeps its size down.
+    Arrays returned by measure_objects are read-only, copy them to modify.
+
+    A function call inside a driver expression does not make the driver
+    depend on the empties it measures, the depsgraph does not know about
+    them. Add the empties as driver variables too (their location for
+    instance) so the driver re-evaluates when they move.
+'''
+
+MEMO_LIMIT = 4096   # flush the memo cache when it grows beyond this
+memo_cache = {}
+
+
+def get_object(item):
+    if isinstance(item, str):
+        return bpy.data.objects[item]
+    return item
+
+
+def memoized(kind, items, compute):
+    coords = get_world_coords([get_object(item) for item in items])
+    key = kind, coords.tobytes()
+    value = memo_cache.get(key)
+    if value is None:
+        if len(memo_cache) >= MEMO_LIMIT:
+            memo_cache.clear()
+        value = compute(coords)
+        # cached arrays are shared between callers, keep them read-only.
+        for array in value:
+            array.setflags(write=False)
+        memo_cache[key] = value
+    return value
+
+
+def clear_memo_cache(scene):
+    memo_cache.clear()
+
+
+def measure_distance(a, b):
+    return float(measure_objects([a, b])[0][0])
+
+
+def measure_angle(a, b, c):
+    return float(measure_objects([a, b, c])[2][1])
+
+
+def flatten_groups(groups, size, kind):
+    items = []
+    for group in groups:
+        if len(group) != size:
+            raise ValueError("%s expects groups of %d objects, got %d" % 
+                             (kind, size, len(group)))
+        items.extend(group)
+    return items
+
+
+def measure_distances(pairs):
+    items = flatten_groups(pairs, 2, 'measure_distances')
+    if not items:
+        return []
+    distances, deltas = memoized('pairs', items, 
+        lambda coords: measure_pairs(coords.reshape(-1, 2, 3)))
+    return distances.tolist()
+
+
+def measure_angles(triples):
+    items = flatten_groups(triples, 3, 'measure_angles')
+    if not items:
+        return []
+    angles = memoized('triples', items, 
+        lambda coords: (measure_triples(coords.reshape(-1, 3, 3)),))
+    return angles[0].tolist()
+
+
+def measure_objects(objects):
+    if len(objects) not in (2,3):
+        raise ValueError("measure_objects expects 2 or 3 objects, got %d" % 
+                         len(objects))
+    return memoized('set', objects, measure_set)
+
+
+def register_driver_functions():
+    for handlers in (bpy.app.handlers.scene_update_pre, 
+                     bpy.app.handlers.frame_change_pre):
+        for handler in handlers[:]:
+            if handler.__name__ == clear_memo_cache.__name__:
+                handlers.remove(handler)
+        handlers.append(clear_memo_cache)
+
+    driver_namespace = bpy.app.driver_namespace
+    driver_namespace['measure_distance'] = measure_distance
+    driver_namespace['measure_angle'] = measure_angle
+    driver_namespace['measure_distances'] = measure_distances
+    driver_namespace['measure_angles'] = measure_angles
+
+
+'''
+    live telemetry export
+
+    When the Telemetry switch is on, the current measurement set is written
+    into a memory-mapped file which other processes can map and read without
+    copying. The file layout, the writer and a reader live in
+    calliper_telemetry.py, which has to be importable for the export to
+    work. The file is rewritten in place, and only when a value changed.
+'''
+
+telemetry_writer = None
+
+
+def get_measurement_set(names_of_empties):
+    if names_of_empties == None:
+        return [], [], []
+
+    distances, deltas, angles = measure_objects(names_of_empties)
+    return distances.tolist(), deltas.ravel().tolist(), angles.tolist()
+
+
+def stop_telemetry():
+    global telemetry_writer
+    if telemetry_writer != None:
+        telemetry_writer.close()
+        telemetry_writer = None
+
+
+def telemetry_update(scene):
+    global telemetry_writer
+
+    if not scene.TelemetryExport:
+        stop_telemetry()
+        return
+
+    path = bpy.path.abspath(scene.TelemetryPath)
+    if telemetry_writer == None or telemetry_writer.path != path:
+        stop_telemetry()
+        try:
+            if scene.TelemetryPath.startswith('//') and not bpy.data.filepath:
+                raise IOError("relative path in an unsaved blend file")
+            # imported here, a missing calliper_telemetry.py only disables
+            # the export and not the rest of the calliper.
+            from calliper_telemetry import TelemetryWriter
+            telemetry_writer = TelemetryWriter(path)
+        except (ImportError, IOError, OSError, ValueError) as error:
+            # report once and switch off, else this fails on every update.
+            print("telemetry export stopped, cannot write", path, ":", error)
+            scene.TelemetryExport = False
+            return
+
+    sel_obs = [ob for ob in scene.objects if ob.select and ob.type=='EMPTY']
+    names = [ob.name for ob in sel_obs]
+    if len(names) not in (2,3):
+        names = None
+
+    telemetry_writer.write(*get_measurement_set(names))
+
+
+def register_telemetry_handler():
+    handlers = bpy.app.handlers.scene_update_post
+    for handler in handlers[:]:
+        if handler.__name__ == telemetry_update.__name__:
+            handlers.remove(handler)
+    handlers.append(telemetry_update)
+
+
 '''
     openGL drawing
 '''
@@ -326,16 +538,8 @@ def draw_tris(region, rv3d, context):
     n = 3       # ratio of shortest edge.
 
     def get_tri_coords(object_list):
-        # replace for empties code.
-        coordlist = [obj.location for obj in object_list]
-        return coordlist
-    
-    def get_angle_rad(set_of_coords):
-        coord1, coord2, coord3 = set_of_coords
-        angle_rad = (coord1-coord2).angle(coord3-coord2)
-        angle_deg = degrees(angle_rad)
-        return angle_rad, angle_deg
-    
+        # world space, the angle labels are measured there too.
+        return get_coordinates_from_empties(object_list)
     
     # if 3 empties selected
     coord1, coord2, coord3 = get_tri_coords(context.selected_objects)
@@ -403,11 +607,13 @@ def draw_tris(region, rv3d, context):
         bgl.glEnd()
         
 
-    # get text.        
-    for item in angle_list:    
+    # get text, angles come from the float64 core in angle_list order.
+    angles = measure_objects(context.selected_objects)[2]
+    for item, angrad in zip(angle_list, angles):    
 
         bgl.glColor4f(0.83, 0.8, 0.9, 0.7)    
-        angrad, angdeg = get_angle_rad(item)
+        angrad = float(angrad)
+        angdeg = degrees(angrad)
         polyline = make_fan_poly_from_edges(item, radial_d)
 
         # find coordinate to place the text
@@ -453,14 +659,15 @@ def draw_callback_px(self, context):
     # draw line    
     if len(names_of_empties) == 2:
         
-        distance_value = get_distance(names_of_empties)
         coordinate_list = get_coordinates_from_empties(objlist)
         
-        # major rewrite candidate
-        l_distance = str(round(distance_value, rounding))
-        x_distance = round(get_difference('x', coordinate_list),rounding)
-        y_distance = round(get_difference('y', coordinate_list),rounding)
-        z_distance = round(get_difference('z', coordinate_list),rounding)
+        # readouts in one float64 pass, coordinate_list is for drawing.
+        distances, deltas = measure_objects(objlist)[:2]
+        dx, dy, dz = deltas[0].tolist()
+        l_distance = str(round(float(distances[0]), rounding))
+        x_distance = round(dx, rounding)
+        y_distance = round(dy, rounding)
+        z_distance = round(dz, rounding)
         l_distance = str(l_distance)+" lin"
         x_distance = str(x_distance)+" x"
         y_distance = str(y_distance)+" y"            
@@ -576,6 +783,25 @@ class ToolPropsPanel(bpy.types.Panel):
             row4.operator("tri.drawing", text="Draw angles")
 
 
+class TelemetryPanel(bpy.types.Panel):
+    bl_label = "Calliper Telemetry"
+    bl_space_type = "VIEW_3D"
+    bl_region_type = "UI"
+
+    scn = bpy.types.Scene
+
+    scn.TelemetryExport = BoolProperty(default=False, name="Telemetry")
+    scn.TelemetryPath = StringProperty(default="//calliper.telemetry", 
+                                       subtype='FILE_PATH', name="")
+
+    # no poll, telemetry can be switched whatever the selection.
+    def draw(self, context):
+        scn = context.scene
+        row = self.layout.row(align=True)
+        row.prop(scn, "TelemetryExport")
+        row.prop(scn, "TelemetryPath")
+
+
 class OBJECT_OT_DrawAngles(bpy.types.Operator):
     bl_idname = "tri.drawing"
     bl_label = "Draw angles"
@@ -716,3 +942,5 @@ class OBJECT_OT_HelloButton(bpy.types.Operator):
     
 
 bpy.utils.register_module(__name__)
+register_driver_functions()
+register_telemetry_handler()
@@ -0,0 +1,151 @@
+import os
+import struct
+import multiprocessing
+
+import pytest
+
+from calliper_telemetry import (TelemetryWriter, TelemetryReader,
+    TELEMETRY_HEADER, TELEMETRY_LAYOUT, TELEMETRY_SIZE, TELEMETRY_SLOTS,
+    TELEMETRY_SEQ_OFFSET, TELEMETRY_COUNTS_OFFSET, TELEMETRY_DATA_OFFSET)
+
+# the readers run in a separate process which maps the file on its own.
+spawn = multiprocessing.get_context('spawn')
+
+
+def wait_in_child(path, last_seq, queue):
+    reader = TelemetryReader(path)
+    queue.put('ready')
+    result = reader.wait(last_seq, timeout=10.0)
+    if result is None:
+        queue.put(None)
+        return
+    seq, distances, deltas, angles = result
+    queue.put((seq, distances.tolist(), deltas.tolist(), angles.tolist()))
+
+
+def check_snapshots_in_child(path, final_seq, queue):
+    # every set written by the parent holds a single repeated value, a
+    # snapshot mixing two values means the seqlock let a torn read through.
+    reader = TelemetryReader(path)
+    queue.put('ready')
+    torn = reads = 0
+    seq = reader.seq
+    while seq < final_seq:
+        seq, distances, deltas, angles = reader.read(timeout=10.0)
+        values = set(distances.tolist() + deltas.ravel().tolist() +
+                     angles.tolist())
+        if len(values) > 1:
+            torn += 1
+        reads += 1
+    queue.put((torn, reads))
+
+
+def measurement(value):
+    return [value] * 3, [value] * 9, [value] * 3
+
+
+def test_layout_matches_writer_format():
+    assert TELEMETRY_LAYOUT.itemsize == TELEMETRY_SIZE
+    assert TELEMETRY_LAYOUT.fields['seq'][1] == TELEMETRY_SEQ_OFFSET
+    assert TELEMETRY_LAYOUT.fields['n_distances'][1] == TELEMETRY_COUNTS_OFFSET
+    assert TELEMETRY_LAYOUT.fields['distances'][1] == TELEMETRY_DATA_OFFSET
+    assert TELEMETRY_LAYOUT.fields['deltas'][1] == (
+        TELEMETRY_DATA_OFFSET + TELEMETRY_SLOTS * 8)
+    assert TELEMETRY_LAYOUT.fields['angles'][1] == (
+        TELEMETRY_DATA_OFFSET + TELEMETRY_SLOTS * 32)
+    assert struct.calcsize(TELEMETRY_HEADER) == TELEMETRY_DATA_OFFSET
+
+
+def test_reader_process_receives_update(tmp_path):
+    path = str(tmp_path / 'calliper.telemetry')
+    writer = TelemetryWriter(path)
+    writer.write([1.0], [0.5, 0.25, 0.125], [])
+
+    queue = spawn.Queue()
+    child = spawn.Process(target=wait_in_child,
+                          args=(path, writer.seq, queue))
+    child.start()
+    assert queue.get(timeout=30) == 'ready'
+
+    writer.write([2.0, 3.0, 4.0], [1.0] * 9, [0.5, 1.0, 1.5])
+    seq, distances, deltas, angles = queue.get(timeout=30)
+    child.join(30)
+    writer.close()
+
+    assert seq == writer.seq
+    assert distances == [2.0, 3.0, 4.0]
+    assert deltas == [[1.0, 1.0, 1.0]] * 3
+    assert angles == [0.5, 1.0, 1.5]
+
+
+def test_reader_process_never_sees_torn_writes(tmp_path):
+    path = str(tmp_path / 'calliper.telemetry')
+    writer = TelemetryWriter(path)
+    writer.write(*measurement(0.0))
+    count = 2000
+    final_seq = writer.seq + 2 * count
+
+    queue = spawn.Queue()
+    child = spawn.Process(target=check_snapshots_in_child,
+                          args=(path, final_seq, queue))
+    child.start()
+    assert queue.get(timeout=30) == 'ready'
+
+    for value in range(1, count + 1):
+        writer.write(*measurement(float(value)))
+    torn, reads = queue.get(timeout=60)
+    child.join(30)
+    writer.close()
+
+    assert reads > 0
+    assert torn == 0
+
+
+def test_unchanged_values_are_not_rewritten(tmp_path):
+    writer = TelemetryWriter(str(tmp_path / 'calliper.telemetry'))
+    assert writer.write(*measurement(1.0))
+    seq = writer.seq
+    assert not writer.write(*measurement(1.0))
+    assert writer.seq == seq
+    writer.close()
+
+
+def test_reopen_keeps_file_and_sequence(tmp_path):
+    path = str(tmp_path / 'calliper.telemetry')
+    writer = TelemetryWriter(path)
+    writer.write(*measurement(1.0))
+    reader = TelemetryReader(path)
+    seq = writer.seq
+    writer.close()
+
+    # a reader holding the mapping keeps working, seq keeps counting up.
+    writer = TelemetryWriter(path)
+    assert os.path.getsize(path) == TELEMETRY_SIZE
+    assert writer.seq == seq
+    assert reader.read()[1].tolist() == [1.0] * 3
+    writer.write(*measurement(2.0))
+    assert reader.seq > seq
+    assert reader.read()[1].tolist() == [2.0] * 3
+    writer.close()
+
+
+def test_refuses_foreign_file(tmp_path):
+    path = tmp_path / 'notes.txt'
+    content = b'not telemetry\n' * 150
+    path.write_bytes(content)
+    with pytest.raises(ValueError):
+        TelemetryWriter(str(path))
+    assert path.read_bytes() == content
+
+
+def test_reader_times_out(tmp_path):
+    path = str(tmp_path / 'calliper.telemetry')
+    writer = TelemetryWriter(path)
+    reader = TelemetryReader(path)
+    assert reader.wait(writer.seq, timeout=0.05) is None
+
+    # a writer stuck mid-write leaves an odd sequence number behind.
+    struct.pack_into('<Q', writer.buffer, TELEMETRY_SEQ_OFFSET, writer.seq + 1)
+    with pytest.raises(RuntimeError):
+        reader.read(timeout=0.05)
+    writer.close()